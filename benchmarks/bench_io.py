@@ -0,0 +1,101 @@
+"""
+File-format I/O benchmark
+
+Times load_data() and export_treatment_list() for CSV, Parquet and Arrow IPC
+files at growing customer counts, resampled from the 250-customer sample.
+
+Usage:
+    python benchmarks/bench_io.py
+    python benchmarks/bench_io.py --sizes 75000 1000000 --formats csv parquet
+    python benchmarks/bench_io.py --chunksize 250000
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from music_streaming_retention_75k import MusicStreamingRetentionOptimizer, write_table
+from bench_model_build import CONSTRAINTS, resample_customers
+
+DEFAULT_SIZES = [75_000, 250_000, 1_000_000]
+EXTENSIONS = {'csv': '.csv', 'parquet': '.parquet', 'arrow': '.arrow'}
+
+
+def write_inputs(customers: pd.DataFrame, directory: str, fmt: str) -> tuple:
+    """Write the churn scores and the customer features in one format."""
+    churn_file = os.path.join(directory, 'churn' + EXTENSIONS[fmt])
+    features_file = os.path.join(directory, 'features' + EXTENSIONS[fmt])
+    scores = customers[['customer_id', 'p']].rename(columns={'p': 'churn_probability'})
+    write_table(scores, churn_file)
+    write_table(customers.drop(columns='p'), features_file)
+    return churn_file, features_file
+
+
+def run(n: int, formats: list, chunksize: int) -> list:
+    customers = resample_customers(n)
+    # Scale the sample's budget and capacities so exports stay proportional to n
+    constraints = dict(CONSTRAINTS)
+    for key in ('weekly_budget', 'email_capacity', 'call_capacity'):
+        constraints[key] = CONSTRAINTS[key] * n / 250
+    
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        for fmt in formats:
+            churn_file, features_file = write_inputs(customers, directory, fmt)
+            optimizer = MusicStreamingRetentionOptimizer(solver='greedy')
+            
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                optimizer.load_data(churn_file, features_file, chunksize=chunksize)
+                t_load = time.perf_counter() - start
+                
+                optimizer.set_constraints(constraints)
+                optimizer.optimize()
+                
+                export_file = os.path.join(directory, 'treatment_list' + EXTENSIONS[fmt])
+                start = time.perf_counter()
+                optimizer.export_treatment_list(export_file)
+                t_export = time.perf_counter() - start
+            
+            rows.append({
+                'customers': n,
+                'format': fmt,
+                'input_mb': (os.path.getsize(churn_file) + os.path.getsize(features_file)) / 1e6,
+                'load_s': t_load,
+                'treated': len(optimizer.results['assignments']),
+                'export_s': t_export,
+                'export_mb': os.path.getsize(export_file) / 1e6
+            })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--formats', nargs='+', choices=list(EXTENSIONS), default=list(EXTENSIONS))
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help='Time the streaming loader with this chunk size')
+    args = parser.parse_args()
+    
+    rows = []
+    for n in args.sizes:
+        rows.extend(run(n, args.formats, args.chunksize))
+        for row in rows[-len(args.formats):]:
+            print(f"  {n:>10,} customers  {row['format']:>8}  "
+                  f"load {row['load_s']:.2f}s  export {row['export_s']:.2f}s")
+    
+    print("\nLoad and export times by format:")
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Model-build scaling benchmark
+
+Times eligibility, pair indexing and Gurobi model construction (no solve)
+for growing customer counts, resampled from the 250-customer sample.
+
+Usage:
+    python benchmarks/bench_model_build.py
+    python benchmarks/bench_model_build.py --sizes 250 75000 --skip-gurobi
+    python benchmarks/bench_model_build.py --build-mode expression
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from music_streaming_retention_75k import MusicStreamingRetentionOptimizer
+
+DEFAULT_SIZES = [250, 2_500, 25_000, 75_000, 250_000, 1_000_000]
+
+CONSTRAINTS = {
+    'weekly_budget': 150,
+    'email_capacity': 120,
+    'call_capacity': 100,
+    'min_high_risk_pct': 0.60,
+    'min_premium_pct': 0.40,
+    'max_action_pct': 0.50,
+    'min_segment_coverage_pct': 0.15
+}
+
+
+def resample_customers(n: int, seed: int = 42) -> pd.DataFrame:
+    """Resample the shipped 250-customer sample up to n customers."""
+    sample = pd.read_csv(os.path.join(ROOT, 'prediction_250.csv')).merge(
+        pd.read_csv(os.path.join(ROOT, 'test_250.csv')), on='customer_id', how='left'
+    )
+    rng = np.random.default_rng(seed)
+    df = sample.iloc[rng.integers(0, len(sample), n)].reset_index(drop=True)
+    df['customer_id'] = np.arange(n)
+    df['churn_probability'] = np.clip(
+        df['churn_probability'] + rng.normal(0, 0.02, n), 0.001, 0.999
+    )
+    return df.rename(columns={'churn_probability': 'p'})
+
+
+def prepare_optimizer(customers: pd.DataFrame) -> MusicStreamingRetentionOptimizer:
+    """Load a customer frame into an optimizer without touching disk."""
+    optimizer = MusicStreamingRetentionOptimizer()
+    with contextlib.redirect_stdout(io.StringIO()):
+        optimizer.customers_df = customers.assign(v=optimizer._estimate_clv(customers))
+        optimizer._create_default_actions()
+        optimizer.set_constraints(CONSTRAINTS)
+    return optimizer
+
+
+def run(n: int, skip_gurobi: bool, build_mode: str) -> dict:
+    optimizer = prepare_optimizer(resample_customers(n))
+    
+    start = time.perf_counter()
+    pairs = optimizer._build_eligible_pairs()
+    t_eligible = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    optimizer._build_pair_index(pairs)
+    t_index = time.perf_counter() - start
+    
+    t_build = float('nan')
+    if not skip_gurobi:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            optimizer.build_model(build_mode)
+            optimizer.model.update()
+        t_build = time.perf_counter() - start
+        optimizer.cleanup()
+    
+    return {
+        'customers': n,
+        'pairs': len(pairs['value']),
+        'eligibility_s': t_eligible,
+        'index_s': t_index,
+        'gurobi_build_s': t_build,
+        'build_us_per_pair': 1e6 * t_build / len(pairs['value'])
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--skip-gurobi', action='store_true',
+                        help='Only time eligibility and indexing')
+    parser.add_argument('--build-mode', choices=['matrix', 'expression'], default='matrix')
+    args = parser.parse_args()
+    
+    rows = []
+    for n in args.sizes:
+        rows.append(run(n, args.skip_gurobi, args.build_mode))
+        print(f"  {n:>10,} customers  {rows[-1]['pairs']:>10,} pairs  "
+              f"build {rows[-1]['gurobi_build_s']:.2f}s")
+    
+    # Linear scaling shows up as a flat per-pair build cost
+    print("\nScaling curve:")
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
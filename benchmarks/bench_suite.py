@@ -0,0 +1,201 @@
+"""
+End-to-end benchmark suite on synthetic customers
+
+Runs the full pipeline (ingestion, CLV, segmentation, eligibility, presolve,
+build, solve, extraction) on seeded synthetic customers at each scale and
+records every stage's time and memory from RunMetrics, the solver statistics
+and the run's peak RSS. Each scale runs in a fresh process so peak RSS
+belongs to that scale alone. Results are saved as JSON; --compare prints the
+stage times against an earlier results file. Everything runs offline.
+
+Usage:
+    python benchmarks/bench_suite.py
+    python benchmarks/bench_suite.py --sizes 250 75000 1000000 10000000 --out bench_v2.json
+    python benchmarks/bench_suite.py --solver greedy --input files --compare bench_v1.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from music_streaming_retention_75k import (
+    MusicStreamingRetentionOptimizer, PIPELINE_STAGES, RunMetrics, peak_rss_mb, write_table, gp, save_scores
+)
+from bench_model_build import CONSTRAINTS
+from synthetic import generate_customers
+
+DEFAULT_SIZES = [250, 75_000, 1_000_000]
+GUROBI_MAX_CUSTOMERS = 75_000  # 'auto' switches to the Lagrangian backend above this
+
+
+def scaled_constraints(n: int) -> dict:
+    """The sample's constraints with budget and capacities scaled to n customers."""
+    constraints = dict(CONSTRAINTS)
+    for key in ('weekly_budget', 'email_capacity', 'call_capacity'):
+        constraints[key] = CONSTRAINTS[key] * n / 250
+    return constraints
+
+
+def pick_solver(solver: str, n: int) -> str:
+    if solver != 'auto':
+        return solver
+    return 'gurobi' if gp is not None and n <= GUROBI_MAX_CUSTOMERS else 'lagrangian'
+
+
+def run_scale(n: int, solver: str, input_mode: str, features_format: str, seed: int,
+              trace_memory: bool) -> dict:
+    """One pipeline run at n customers; meant to run in its own process."""
+    row = {'customers': n, 'solver': solver, 'input': input_mode, 'seed': seed}
+    start = time.perf_counter()
+    customers = generate_customers(n, seed)
+    row['generate_s'] = time.perf_counter() - start
+
+    optimizer = MusicStreamingRetentionOptimizer(solver=solver, metrics=RunMetrics(trace_memory=trace_memory))
+    try:
+        with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            if input_mode == 'files':
+                scores_file = os.path.join(directory, 'scores.npy')
+                features_file = os.path.join(directory, 'features.' + features_format)
+                save_scores(scores_file, customers['customer_id'].to_numpy(),
+                            customers['churn_probability'].to_numpy(np.float32))
+                write_table(customers.drop(columns='churn_probability'), features_file)
+                row['write_s'] = time.perf_counter() - start
+                del customers
+                start = time.perf_counter()
+                optimizer.load_scores(scores_file, features_file)
+            else:
+                optimizer.load_frames(customers)
+                del customers
+            optimizer.set_constraints(scaled_constraints(n))
+            optimizer.optimize()
+            row['total_s'] = time.perf_counter() - start
+    except Exception as e:  # A failed scale is recorded, the suite goes on
+        row['error'] = f"{type(e).__name__}: {e}"
+    finally:
+        optimizer.cleanup()
+
+    kpis = optimizer.results.get('kpis', {})
+    row['net_value'] = kpis.get('net_value')
+    row['customers_treated'] = kpis.get('customers_treated')
+    row['peak_rss_mb'] = peak_rss_mb()
+    metrics = optimizer.metrics.to_dict()
+    row['solver_stats'] = metrics.pop('solver')
+    row.update(metrics)
+    return row
+
+
+def environment() -> dict:
+    """Versions and hardware, so results from different machines are not mixed up."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'gurobi': '.'.join(map(str, gp.gurobi.version())) if gp is not None else None
+    }
+
+
+def stage_table(runs: list) -> pd.DataFrame:
+    """One row per run: stage seconds, counts, solve result and peak RSS."""
+    rows = []
+    for run in runs:
+        row = {'customers': run['customers'], 'solver': run['solver']}
+        for stage in PIPELINE_STAGES:
+            row[stage] = run['stages'].get(stage, {}).get('seconds', np.nan)
+        row['total_s'] = run.get('total_s', np.nan)
+        row['pairs'] = run['counts'].get('pairs', np.nan)
+        row['peak_rss_mb'] = run['peak_rss_mb']
+        row['net_value'] = run['net_value']
+        row['gap'] = run['solver_stats'].get('gap')
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def compare(runs: list, baseline_file: str) -> pd.DataFrame:
+    """Stage times of this run divided by the baseline's, for matching scale and solver."""
+    with open(baseline_file) as f:
+        baseline = stage_table(json.load(f)['runs'])
+    current = stage_table(runs)
+    merged = current.merge(baseline, on=['customers', 'solver'], suffixes=('', '_base'))
+    ratios = merged[['customers', 'solver']].copy()
+    for column in list(PIPELINE_STAGES) + ['total_s', 'peak_rss_mb']:
+        ratios[column] = merged[column] / merged[column + '_base']
+    ratios['net_value_change'] = merged['net_value'] - merged['net_value_base']
+    return ratios
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help='Customer counts; add 10000000 for the 10M scale')
+    parser.add_argument('--solver', choices=['auto', 'gurobi', 'greedy', 'lagrangian'], default='auto',
+                        help=f"'auto' uses Gurobi up to {GUROBI_MAX_CUSTOMERS:,} customers, "
+                             "the Lagrangian backend above")
+    parser.add_argument('--input', choices=['frames', 'files'], default='frames',
+                        help="'frames' hands a DataFrame to load_frames(); 'files' writes a .npy "
+                             "score file and a feature file and times load_scores()")
+    parser.add_argument('--features-format', choices=['csv', 'parquet', 'arrow'], default='csv')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--trace-memory', action='store_true',
+                        help='Also record tracemalloc peaks per stage (slower)')
+    parser.add_argument('--out', default='bench_results.json')
+    parser.add_argument('--compare', metavar='BASELINE_JSON',
+                        help='Print stage-time ratios against an earlier results file')
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context('spawn')
+    runs = []
+    for n in args.sizes:
+        solver = pick_solver(args.solver, n)
+        with context.Pool(1) as pool:
+            run = pool.apply(run_scale, (n, solver, args.input, args.features_format, args.seed,
+                                         args.trace_memory))
+        runs.append(run)
+        if 'error' in run:
+            print(f"  {n:>10,} customers  {solver:>10}  FAILED: {run['error']}")
+        else:
+            print(f"  {n:>10,} customers  {solver:>10}  {run['total_s']:.2f}s  "
+                  f"peak RSS {run['peak_rss_mb'] or float('nan'):,.0f} MB  net value ${run['net_value']:,.0f}")
+
+    results = {
+        'created': pd.Timestamp.now().isoformat(timespec='seconds'),
+        'environment': environment(),
+        'arguments': vars(args),
+        'runs': runs
+    }
+    with open(args.out, 'w') as f:
+        json.dump(results, f, indent=2, default=lambda o: o.item() if hasattr(o, 'item') else str(o))
+
+    print("\nStage times (s):")
+    print(stage_table(runs).to_string(index=False))
+    if args.compare:
+        print(f"\nRatio to {args.compare} (< 1 is faster):")
+        print(compare(runs, args.compare).round(3).to_string(index=False))
+    print(f"\nResults saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Seeded synthetic customers shaped like the shipped sample
+
+Generates the columns of test_250.csv (subscription_type, payment_plan,
+weekly_hours, weekly_songs_played, num_playlists_created) plus a
+churn_probability whose distribution matches prediction_250.csv, at any
+scale and without reading the sample files.
+
+Usage:
+    python benchmarks/synthetic.py --customers 75000 --out customers_75k.csv
+    python benchmarks/synthetic.py --compare        # sample vs. synthetic summary
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from music_streaming_retention_75k import write_table
+
+SUBSCRIPTIONS = ['Family', 'Free', 'Premium', 'Student']
+PAYMENT_PLANS = ['Monthly', 'Yearly']
+YEARLY_SHARE = 0.55
+
+# Churn log-odds fitted on the sample: subscription intercepts, plan and
+# listening-hours effects, and the residual spread that makes the scores
+# pile up near 0 and 1 like the XGBoost predictions do
+CHURN_LOGIT = {'Family': -0.996, 'Free': 2.169, 'Premium': -1.288, 'Student': 0.921}
+CHURN_YEARLY = -0.134
+CHURN_PER_HOUR = -0.077
+CHURN_NOISE = 2.35
+
+BLOCK = 1_000_000
+
+
+def generate_customers(n: int, seed: int = 42, first_id: int = 100_000) -> pd.DataFrame:
+    """
+    Synthetic customers with scores and features in one frame.
+
+    Customers are drawn in blocks of BLOCK from per-block seeds, so the
+    first n customers are the same at every scale and memory stays bounded
+    by the output. Categorical columns are pandas categoricals.
+
+    Args:
+        n: Number of customers
+        seed: Base seed; the same seed gives the same customers
+        first_id: customer_id of the first customer (ids are consecutive)
+
+    Returns:
+        DataFrame with customer_id, churn_probability and the test_250.csv
+        feature columns
+    """
+    subscription = np.empty(n, dtype=np.int8)
+    yearly = np.empty(n, dtype=bool)
+    hours = np.empty(n, dtype=np.float64)
+    songs = np.empty(n, dtype=np.int64)
+    playlists = np.empty(n, dtype=np.int64)
+    churn = np.empty(n, dtype=np.float64)
+    logit = np.array([CHURN_LOGIT[name] for name in SUBSCRIPTIONS])
+
+    for start in range(0, n, BLOCK):
+        block = slice(start, min(start + BLOCK, n))
+        size = block.stop - block.start
+        rng = np.random.default_rng([seed, start // BLOCK])
+        subscription[block] = rng.integers(0, len(SUBSCRIPTIONS), size)
+        yearly[block] = rng.random(size) < YEARLY_SHARE
+        hours[block] = rng.uniform(0.05, 50.0, size)
+        songs[block] = rng.integers(0, 500, size)
+        playlists[block] = rng.integers(0, 100, size)
+        z = (logit[subscription[block]] + CHURN_YEARLY * yearly[block]
+             + CHURN_PER_HOUR * (hours[block] - 25.0) + rng.normal(0.0, CHURN_NOISE, size))
+        churn[block] = np.round(1.0 / (1.0 + np.exp(-z)), 6)
+
+    return pd.DataFrame({
+        'customer_id': np.arange(first_id, first_id + n, dtype=np.int64),
+        'churn_probability': churn,
+        'subscription_type': pd.Categorical.from_codes(subscription, SUBSCRIPTIONS),
+        'payment_plan': pd.Categorical.from_codes(yearly.astype(np.int8), PAYMENT_PLANS),
+        'weekly_hours': hours,
+        'weekly_songs_played': songs,
+        'num_playlists_created': playlists
+    })
+
+
+def summarize(customers: pd.DataFrame) -> pd.Series:
+    """Distribution summary used to check the generator against the sample."""
+    p = customers['churn_probability']
+    summary = {
+        'churn_mean': p.mean(),
+        'churn_std': p.std(),
+        'churn_lt_0.1': (p < 0.1).mean(),
+        'churn_gt_0.9': (p > 0.9).mean(),
+        'high_risk_gt_0.5': (p > 0.5).mean(),
+        'yearly_share': (customers['payment_plan'] == 'Yearly').mean(),
+        'mean_weekly_hours': customers['weekly_hours'].mean()
+    }
+    for name in SUBSCRIPTIONS:
+        summary[f'churn_mean_{name}'] = p[customers['subscription_type'] == name].mean()
+    return pd.Series(summary)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--customers', type=int, default=75_000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--out', help='Write the customers here (.csv, .parquet or .arrow)')
+    parser.add_argument('--compare', action='store_true',
+                        help='Print the sample and synthetic distributions side by side')
+    args = parser.parse_args()
+
+    customers = generate_customers(args.customers, args.seed)
+    if args.out:
+        write_table(customers, args.out)
+        print(f"Wrote {len(customers):,} customers to {args.out}")
+    if args.compare:
+        sample = pd.read_csv(os.path.join(ROOT, 'prediction_250.csv')).merge(
+            pd.read_csv(os.path.join(ROOT, 'test_250.csv')), on='customer_id', how='left'
+        )
+        print(pd.DataFrame({'sample': summarize(sample), 'synthetic': summarize(customers)}).round(3).to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -3,31 +3,20 @@ PlaylistPro Retention Optimizer - Single Page Dashboard
 Business narrative + Interactive optimizer in one place
 """
 
+import json
+
 import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-from music_streaming_retention_75k import MusicStreamingRetentionOptimizer
-import os
-
-# Page configuration
-st.set_page_config(
-    page_title="PlaylistPro Retention Optimizer",
-    page_icon="🎵",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
+from music_streaming_retention_75k import GRB, JobRunner, PIPELINE_STAGES
 
-# Initialize session state
-if 'optimizer' not in st.session_state:
-    st.session_state.optimizer = None
-if 'results_ready' not in st.session_state:
-    st.session_state.results_ready = False
-if 'data_loaded' not in st.session_state:
-    st.session_state.data_loaded = False
-if 'merged_data' not in st.session_state:
-    st.session_state.merged_data = None
+# One worker pool for every session: solves run off the script thread, and
+# at most max_workers run at once however many analysts are connected
+@st.cache_resource
+def job_runner():
+    return JobRunner()
 
 # Helper function
 def load_customer_data():
@@ -41,214 +30,282 @@ def load_customer_data():
         st.error(f"Data file not found: {e}")
         return None, 0, 0
 
-# Header
-st.title("PlaylistPro Retention Optimizer")
-st.markdown("**Data-Driven Customer Retention Strategy**")
-
-st.markdown("---")
-
-# Business Context Section
-st.markdown("### The Challenge")
-st.info("**PlaylistPro is losing 1 out of every 2 customers each year** (47% churn rate). With 75,000 subscribers, this means millions in lost recurring revenue.")
-
-st.markdown("### What This Tool Does")
-st.markdown("This **self-serve analytics dashboard** answers: *Given my budget and resources, which customers should I target and what retention actions maximize value?*")
-
-col1, col2, col3 = st.columns(3)
-
-with col1:
-    st.markdown("#### 📈 Predict")
-    st.markdown("XGBoost model (94% accuracy) calculates churn probability for each customer")
-
-with col2:
-    st.markdown("#### 🎯 Optimize")
-    st.markdown("Algorithm finds the best treatment plan to maximize retained customer value")
-
-with col3:
-    st.markdown("#### 🔄 Analyze")
-    st.markdown("Run what-if scenarios by adjusting budgets and policies in the sidebar")
-
-st.markdown("---")
-
-# Collapsible section for controls explanation
-with st.expander("💡 Understanding the Controls (Click to Expand)"):
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.markdown("**Budget & Capacity**")
-        st.markdown("""
-        - **Weekly Budget** — Total campaign spend available
-        - **Email Capacity** — Max emails your team can send
-        - **Push Capacity** — Max push/in-app messages allowed
-        """)
+def progress_listener(progress_bar, status_text):
+    """RunMetrics listener that moves the progress bar through the pipeline stages."""
+    band = 100 / len(PIPELINE_STAGES)
     
-    with col2:
-        st.markdown("**Policy Constraints**")
-        st.markdown("""
-        - **High-Risk Coverage** — Min % of at-risk customers to treat
-        - **Premium Coverage** — Min % of Premium subscribers to treat
-        - **Action Saturation** — Prevents over-using one tactic
-        - **Segment Coverage** — Ensures all segments get attention
-        """)
-
-with st.expander("📊 How to Interpret Results (Click to Expand)"):
-    st.markdown("""
-    | Metric | What It Means |
-    |--------|---------------|
-    | **Customers Treated** | Number of people receiving retention actions |
-    | **Weekly Spend** | Actual budget used (may be less than limit) |
-    | **Churn Prevented** | Expected customers saved from churning |
-    | **Retained CLV** | Total customer lifetime value saved |
-    | **ROI** | Return on investment (%) |
-    | **Net Value** | Bottom-line impact (Retained CLV - Spend) |
-    """)
-    
-    st.success("**Baseline Performance:** \\$150 budget → \\$3,479 net value (2,319% ROI), 75 customers treated, ~5 churns prevented")
-    st.info("**Optimal Range:** \\$250-400 weekly budget delivers strongest returns")
-
-st.markdown("---")
+    def listener(event):
+        if event['event'] == 'stage_start' and event['stage'] in PIPELINE_STAGES:
+            step = PIPELINE_STAGES.index(event['stage'])
+            progress_bar.progress(int(step * band))
+            status_text.text(f"{event['stage'].capitalize()}...")
+        elif event['event'] == 'mip_progress' and event['gap'] is not None:
+            # Within the solve band, advance as the MIP gap closes
+            step = PIPELINE_STAGES.index('solve')
+            done = 1 - min(event['gap'], 1.0)
+            progress_bar.progress(int((step + done) * band))
+            status_text.text(f"Solving... gap {event['gap']:.2%}, {event['nodes']:,} nodes")
+    return listener
 
-# Load data on startup
-if not st.session_state.data_loaded:
-    with st.spinner("Loading customer data..."):
-        merged_data, n_pred, n_feat = load_customer_data()
-        if merged_data is not None:
-            st.session_state.merged_data = merged_data
-            st.session_state.data_loaded = True
-
-# Sidebar Configuration
-with st.sidebar:
-    st.header("Optimization Settings")
-    
-    st.markdown("### Budget & Capacity")
-    
-    budget = st.slider(
-        "Weekly Budget ($)",
-        min_value=150,
-        max_value=1000,
-        value=150,
-        step=25,
-        help="Optimal range: $250-400"
-    )
+@st.fragment(run_every=0.5)
+def job_progress(runner):
+    """
+    Follow the session's job without blocking the script: only this fragment
+    reruns while the job is queued or running, so the page (and Cancel)
+    stay responsive. When the job ends, a full rerun shows the outcome.
+    """
+    job_id = st.session_state.job_id
+    try:
+        status = runner.poll(job_id)
+    except KeyError:
+        status = {'state': 'expired'}
     
-    email_cap = st.slider(
-        "Email Capacity (per week)",
-        min_value=60,
-        max_value=250,
-        value=120,
-        step=10
-    )
+    if status['state'] in ('queued', 'running'):
+        st.header("Running Optimization...")
+        progress_bar = st.progress(0)
+        status_text = st.empty()
+        if status['state'] == 'queued':
+            status_text.text("Waiting for a free solver worker...")
+        else:
+            listener = progress_listener(progress_bar, status_text)
+            if status['stage'] is not None:
+                listener({'event': 'stage_start', 'stage': status['stage']})
+            if status['event'] is not None:
+                listener(status['event'])
+        if st.button("Cancel", key="cancel_job"):
+            runner.cancel(job_id)
+        return
     
-    push_cap = st.slider(
-        "Push/In-App Capacity",
-        min_value=50,
-        max_value=250,
-        value=100,
-        step=10
+    st.session_state.job_id = None
+    if status['state'] == 'done':
+        st.session_state.result = runner.result(job_id)
+        solver = st.session_state.result['results']['solver']
+        if solver.get('backend') == 'gurobi' and solver.get('status') != GRB.OPTIMAL:
+            st.session_state.job_message = (
+                'warning',
+                f"Solver stopped with status {solver['status']} (e.g. the time limit): "
+                f"best plan found, {solver['gap']:.2%} from the bound."
+            )
+        else:
+            st.session_state.job_message = ('success', "Optimization completed successfully!")
+    elif status['state'] == 'cancelled':
+        st.session_state.job_message = ('warning', "Optimization cancelled.")
+    elif status['state'] == 'expired':
+        st.session_state.job_message = ('warning', "The optimization job expired; run it again.")
+    else:
+        st.session_state.result = None
+        st.session_state.job_message = ('error', f"Optimization failed: {status['error']}")
+    st.rerun()
+
+def main():
+    # Streamlit runs this script as __main__; spawned JobRunner workers import it
+    # as __mp_main__ and must not render the page (or start another runner)
+    # Page configuration
+    st.set_page_config(
+        page_title="PlaylistPro Retention Optimizer",
+        page_icon="🎵",
+        layout="wide",
+        initial_sidebar_state="expanded"
     )
     
-    st.markdown("### Policy Constraints")
-    
-    min_high_risk = st.slider(
-        "Min High-Risk Coverage (%)",
-        min_value=40,
-        max_value=90,
-        value=60,
-        step=5
-    ) / 100.0
-    
-    min_premium = st.slider(
-        "Min Premium Coverage (%)",
-        min_value=10,
-        max_value=80,
-        value=40,
-        step=5
-    ) / 100.0
+    # Initialize session state
+    if 'job_id' not in st.session_state:
+        st.session_state.job_id = None
+    if 'result' not in st.session_state:
+        st.session_state.result = None
+    if 'data_loaded' not in st.session_state:
+        st.session_state.data_loaded = False
+    if 'merged_data' not in st.session_state:
+        st.session_state.merged_data = None
     
-    max_action_pct = st.slider(
-        "Max Action Saturation (%)",
-        min_value=30,
-        max_value=80,
-        value=50,
-        step=5
-    ) / 100.0
-    
-    min_segment_coverage = st.slider(
-        "Min Segment Coverage (%)",
-        min_value=10,
-        max_value=40,
-        value=15,
-        step=5
-    ) / 100.0
+    # Header
+    st.title("PlaylistPro Retention Optimizer")
+    st.markdown("**Data-Driven Customer Retention Strategy**")
     
     st.markdown("---")
     
-    run_optimization = st.button(
-        "RUN OPTIMIZATION",
-        type="primary",
-        use_container_width=True
-    )
-
-# Main content
-if st.session_state.data_loaded and st.session_state.merged_data is not None:
-    
-    df = st.session_state.merged_data
+    # Business Context Section
+    st.markdown("### The Challenge")
+    st.info("**PlaylistPro is losing 1 out of every 2 customers each year** (47% churn rate). With 75,000 subscribers, this means millions in lost recurring revenue.")
     
-    # Overview
-    st.header("Current Week Overview")
+    st.markdown("### What This Tool Does")
+    st.markdown("This **self-serve analytics dashboard** answers: *Given my budget and resources, which customers should I target and what retention actions maximize value?*")
     
-    col1, col2, col3, col4 = st.columns(4)
+    col1, col2, col3 = st.columns(3)
     
     with col1:
-        st.metric("Total Customers", f"{len(df):,}")
+        st.markdown("#### 📈 Predict")
+        st.markdown("XGBoost model (94% accuracy) calculates churn probability for each customer")
     
     with col2:
-        high_risk = (df['churn_probability'] > 0.5).sum()
-        st.metric("High Risk (p > 0.5)", f"{high_risk:,}")
+        st.markdown("#### 🎯 Optimize")
+        st.markdown("Algorithm finds the best treatment plan to maximize retained customer value")
     
     with col3:
-        avg_prob = df['churn_probability'].mean()
-        st.metric("Avg Churn Probability", f"{avg_prob:.1%}")
+        st.markdown("#### 🔄 Analyze")
+        st.markdown("Run what-if scenarios by adjusting budgets and policies in the sidebar")
     
-    with col4:
-        premium_customers = (df['subscription_type'] == 'Premium').sum()
-        st.metric("Premium Customers", f"{premium_customers:,}")
+    st.markdown("---")
+    
+    # Collapsible section for controls explanation
+    with st.expander("💡 Understanding the Controls (Click to Expand)"):
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.markdown("**Budget & Capacity**")
+            st.markdown("""
+            - **Weekly Budget** — Total campaign spend available
+            - **Email Capacity** — Max emails your team can send
+            - **Push Capacity** — Max push/in-app messages allowed
+            """)
+        
+        with col2:
+            st.markdown("**Policy Constraints**")
+            st.markdown("""
+            - **High-Risk Coverage** — Min % of at-risk customers to treat
+            - **Premium Coverage** — Min % of Premium subscribers to treat
+            - **Action Saturation** — Prevents over-using one tactic
+            - **Segment Coverage** — Ensures all segments get attention
+            """)
+    
+    with st.expander("📊 How to Interpret Results (Click to Expand)"):
+        st.markdown("""
+        | Metric | What It Means |
+        |--------|---------------|
+        | **Customers Treated** | Number of people receiving retention actions |
+        | **Weekly Spend** | Actual budget used (may be less than limit) |
+        | **Churn Prevented** | Expected customers saved from churning |
+        | **Retained CLV** | Total customer lifetime value saved |
+        | **ROI** | Return on investment (%) |
+        | **Net Value** | Bottom-line impact (Retained CLV - Spend) |
+        """)
+        
+        st.success("**Baseline Performance:** \\$150 budget → \\$3,479 net value (2,319% ROI), 75 customers treated, ~5 churns prevented")
+        st.info("**Optimal Range:** \\$250-400 weekly budget delivers strongest returns")
     
     st.markdown("---")
     
-    # Run optimization
-    if run_optimization:
-        st.header("Running Optimization...")
+    # Load data on startup
+    if not st.session_state.data_loaded:
+        with st.spinner("Loading customer data..."):
+            merged_data, n_pred, n_feat = load_customer_data()
+            if merged_data is not None:
+                st.session_state.merged_data = merged_data
+                st.session_state.data_loaded = True
+    
+    # Sidebar Configuration
+    with st.sidebar:
+        st.header("Optimization Settings")
         
-        progress_bar = st.progress(0)
-        status_text = st.empty()
+        st.markdown("### Budget & Capacity")
         
-        try:
-            status_text.text("Preparing data...")
-            progress_bar.progress(20)
-            
-            df.to_csv('temp_optimization_data.csv', index=False)
-            
-            status_text.text("Initializing optimizer...")
-            progress_bar.progress(40)
-            
-            optimizer = MusicStreamingRetentionOptimizer()
-            
-            df[['customer_id', 'churn_probability']].to_csv('temp_churn.csv', index=False)
-            feature_cols = ['customer_id', 'subscription_type', 'payment_plan', 
-                           'weekly_hours', 'weekly_songs_played', 'num_playlists_created']
-            df[feature_cols].to_csv('temp_features.csv', index=False)
-            
-            optimizer.load_data(
-                churn_file='temp_churn.csv',
-                customer_features_file='temp_features.csv',
-                actions_file=None
-            )
-            
-            status_text.text("Setting constraints...")
-            progress_bar.progress(60)
-            
-            optimizer.set_constraints({
+        budget = st.slider(
+            "Weekly Budget ($)",
+            min_value=150,
+            max_value=1000,
+            value=150,
+            step=25,
+            help="Optimal range: $250-400"
+        )
+        
+        email_cap = st.slider(
+            "Email Capacity (per week)",
+            min_value=60,
+            max_value=250,
+            value=120,
+            step=10
+        )
+        
+        push_cap = st.slider(
+            "Push/In-App Capacity",
+            min_value=50,
+            max_value=250,
+            value=100,
+            step=10
+        )
+        
+        st.markdown("### Policy Constraints")
+        
+        min_high_risk = st.slider(
+            "Min High-Risk Coverage (%)",
+            min_value=40,
+            max_value=90,
+            value=60,
+            step=5
+        ) / 100.0
+        
+        min_premium = st.slider(
+            "Min Premium Coverage (%)",
+            min_value=10,
+            max_value=80,
+            value=40,
+            step=5
+        ) / 100.0
+        
+        max_action_pct = st.slider(
+            "Max Action Saturation (%)",
+            min_value=30,
+            max_value=80,
+            value=50,
+            step=5
+        ) / 100.0
+        
+        min_segment_coverage = st.slider(
+            "Min Segment Coverage (%)",
+            min_value=10,
+            max_value=40,
+            value=15,
+            step=5
+        ) / 100.0
+        
+        time_limit = st.slider(
+            "Solver Time Limit (seconds)",
+            min_value=10,
+            max_value=300,
+            value=60,
+            step=10,
+            help="The best plan found by then is returned"
+        )
+        
+        st.markdown("---")
+        
+        run_optimization = st.button(
+            "RUN OPTIMIZATION",
+            type="primary",
+            use_container_width=True
+        )
+    
+    # Main content
+    if st.session_state.data_loaded and st.session_state.merged_data is not None:
+        
+        df = st.session_state.merged_data
+        
+        # Overview
+        st.header("Current Week Overview")
+        
+        col1, col2, col3, col4 = st.columns(4)
+        
+        with col1:
+            st.metric("Total Customers", f"{len(df):,}")
+        
+        with col2:
+            high_risk = (df['churn_probability'] > 0.5).sum()
+            st.metric("High Risk (p > 0.5)", f"{high_risk:,}")
+        
+        with col3:
+            avg_prob = df['churn_probability'].mean()
+            st.metric("Avg Churn Probability", f"{avg_prob:.1%}")
+        
+        with col4:
+            premium_customers = (df['subscription_type'] == 'Premium').sum()
+            st.metric("Premium Customers", f"{premium_customers:,}")
+        
+        st.markdown("---")
+        
+        # Run optimization
+        runner = job_runner()
+        if run_optimization:
+            constraints = {
                 'weekly_budget': budget,
                 'email_capacity': email_cap,
                 'call_capacity': push_cap,
@@ -256,109 +313,119 @@ if st.session_state.data_loaded and st.session_state.merged_data is not None:
                 'min_premium_pct': min_premium,
                 'max_action_pct': max_action_pct,
                 'min_segment_coverage_pct': min_segment_coverage
-            })
-            
-            status_text.text("Solving optimization (30-90 seconds)...")
-            progress_bar.progress(80)
-            
-            optimizer.optimize()
-            
-            status_text.text("Complete!")
-            progress_bar.progress(100)
-            
-            st.session_state.optimizer = optimizer
-            st.session_state.results_ready = True
-            
-            st.success("Optimization completed successfully!")
-            
-            for f in ['temp_churn.csv', 'temp_features.csv', 'temp_optimization_data.csv']:
-                if os.path.exists(f):
-                    os.remove(f)
-            
-        except Exception as e:
-            st.error(f"Optimization failed: {str(e)}")
-            st.session_state.results_ready = False
-    
-    # Results
-    if st.session_state.results_ready and st.session_state.optimizer is not None:
-        st.markdown("---")
-        st.header("Optimization Results")
+            }
+            # merged_data already joins predictions and features: hand it over in memory.
+            # A worker that solved these customers before re-solves its live model in place.
+            model_cols = ['customer_id', 'churn_probability', 'subscription_type', 'payment_plan',
+                          'weekly_hours', 'weekly_songs_played', 'num_playlists_created']
+            st.session_state.job_id = runner.submit(df[model_cols], constraints, time_limit=time_limit)
         
-        optimizer = st.session_state.optimizer
-        kpis = optimizer.results.get('kpis', {})
-        assignments = optimizer.results.get('assignments', pd.DataFrame())
+        if st.session_state.job_id is not None:
+            job_progress(runner)
         
-        if kpis and not assignments.empty:
-            
-            # Key Metrics
-            col1, col2, col3, col4, col5 = st.columns(5)
-            
-            with col1:
-                st.metric("Customers Treated", f"{kpis['customers_treated']:,}")
-            
-            with col2:
-                st.metric("Weekly Spend", f"${kpis['total_spend']:,.0f}")
-            
-            with col3:
-                st.metric("Churn Prevented", f"{kpis['expected_churn_reduction']:.0f}")
-            
-            with col4:
-                st.metric("Retained CLV", f"${kpis['expected_retained_clv']:,.0f}")
-            
-            with col5:
-                st.metric("ROI", f"{kpis['roi']:.0f}%")
-            
-            st.success(f"**Net Value: ${kpis['net_value']:,.0f}**")
-            
+        message = st.session_state.pop('job_message', None)
+        if message is not None:
+            kind, text = message
+            getattr(st, kind)(text)
+        
+        # Results
+        if st.session_state.result is not None:
             st.markdown("---")
+            st.header("Optimization Results")
             
-            # Results tabs
-            tab1, tab2 = st.tabs(["Treatment Plan", "Top Customers"])
+            results = st.session_state.result['results']
+            kpis = results.get('kpis', {})
+            assignments = results.get('assignments', pd.DataFrame())
             
-            with tab1:
-                action_summary = assignments.groupby('action_name').agg({
-                    'customer_id': 'count',
-                    'cost': 'sum',
-                    'net_value': 'sum'
-                }).reset_index()
-                action_summary.columns = ['Action', 'Customers', 'Total Cost', 'Net Value']
+            if kpis and not assignments.empty:
                 
-                st.dataframe(action_summary, use_container_width=True, hide_index=True)
-            
-            with tab2:
-                top_customers = assignments.nlargest(50, 'net_value')[[
-                    'customer_id', 'subscription_type', 'churn_prob',
-                    'action_name', 'net_value'
-                ]].copy()
+                # Key Metrics
+                col1, col2, col3, col4, col5 = st.columns(5)
                 
-                st.dataframe(top_customers, use_container_width=True, hide_index=True)
-            
-            st.markdown("---")
-            
-            # Export
-            st.subheader("Export Treatment Plan")
-            
-            export_df = assignments.copy()
-            csv = export_df.to_csv(index=False)
-            
-            st.download_button(
-                label="Download Complete Treatment Plan (CSV)",
-                data=csv,
-                file_name=f"treatment_plan_{pd.Timestamp.now().strftime('%Y%m%d')}.csv",
-                mime="text/csv"
-            )
+                with col1:
+                    st.metric("Customers Treated", f"{kpis['customers_treated']:,}")
+                
+                with col2:
+                    st.metric("Weekly Spend", f"${kpis['total_spend']:,.0f}")
+                
+                with col3:
+                    st.metric("Churn Prevented", f"{kpis['expected_churn_reduction']:.0f}")
+                
+                with col4:
+                    st.metric("Retained CLV", f"${kpis['expected_retained_clv']:,.0f}")
+                
+                with col5:
+                    st.metric("ROI", f"{kpis['roi']:.0f}%")
+                
+                st.success(f"**Net Value: ${kpis['net_value']:,.0f}**")
+                
+                st.markdown("---")
+                
+                # Results tabs
+                tab1, tab2 = st.tabs(["Treatment Plan", "Top Customers"])
+                
+                with tab1:
+                    action_summary = assignments.groupby('action_name').agg({
+                        'customer_id': 'count',
+                        'cost': 'sum',
+                        'net_value': 'sum'
+                    }).reset_index()
+                    action_summary.columns = ['Action', 'Customers', 'Total Cost', 'Net Value']
+                    
+                    st.dataframe(action_summary, use_container_width=True, hide_index=True)
+                
+                with tab2:
+                    top_customers = assignments.nlargest(50, 'net_value')[[
+                        'customer_id', 'subscription_type', 'churn_prob',
+                        'action_name', 'net_value'
+                    ]].copy()
+                    
+                    st.dataframe(top_customers, use_container_width=True, hide_index=True)
+                
+                with st.expander("Run Metrics (stage timings and solver statistics)"):
+                    metrics = st.session_state.result['metrics']
+                    stages = pd.DataFrame([
+                        {'Stage': name, **record} for name, record in metrics['stages'].items()
+                    ])
+                    st.dataframe(stages, use_container_width=True, hide_index=True)
+                    st.json({'counts': metrics['counts'], 'solver': metrics['solver']})
+                    st.download_button(
+                        label="Download Run Metrics (JSON)",
+                        data=json.dumps(metrics, indent=2, default=lambda o: o.item() if hasattr(o, 'item') else str(o)),
+                        file_name=f"run_metrics_{pd.Timestamp.now().strftime('%Y%m%d')}.json",
+                        mime="application/json"
+                    )
+                
+                st.markdown("---")
+                
+                # Export
+                st.subheader("Export Treatment Plan")
+                
+                export_df = assignments.copy()
+                csv = export_df.to_csv(index=False)
+                
+                st.download_button(
+                    label="Download Complete Treatment Plan (CSV)",
+                    data=csv,
+                    file_name=f"treatment_plan_{pd.Timestamp.now().strftime('%Y%m%d')}.csv",
+                    mime="text/csv"
+                )
+    
+    else:
+        st.error("Unable to load customer data. Please ensure prediction_250.csv and test_250.csv are in the project directory.")
+    
+    # Footer
+    st.markdown("---")
+    st.markdown("""
+    <div style='text-align: center; color: #7f8c8d; padding: 1rem 0;'>
+        <p><strong>PlaylistPro Retention Optimizer</strong></p>
+        <p>Predictive Analytics + Prescriptive Optimization</p>
+        <p style='font-size: 0.85rem; margin-top: 0.5rem;'>
+            © 2025 PlaylistPro Analytics Team | Satkar Karki
+        </p>
+    </div>
+    """, unsafe_allow_html=True)
 
-else:
-    st.error("Unable to load customer data. Please ensure prediction_250.csv and test_250.csv are in the project directory.")
 
-# Footer
-st.markdown("---")
-st.markdown("""
-<div style='text-align: center; color: #7f8c8d; padding: 1rem 0;'>
-    <p><strong>PlaylistPro Retention Optimizer</strong></p>
-    <p>Predictive Analytics + Prescriptive Optimization</p>
-    <p style='font-size: 0.85rem; margin-top: 0.5rem;'>
-        © 2025 PlaylistPro Analytics Team | Satkar Karki
-    </p>
-</div>
-""", unsafe_allow_html=True)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Shared fixtures for the test suite, which runs on the 250-customer sample.
+
+Run from the repository root:
+    python -m pytest -q
+"""
+
+import os
+
+import pandas as pd
+import pytest
+
+from support import CONSTRAINTS, ROOT, MusicStreamingRetentionOptimizer, quiet
+
+
+@pytest.fixture(scope='session')
+def sample() -> pd.DataFrame:
+    """Predictions and features of the 250-customer sample, joined on customer_id."""
+    predictions = pd.read_csv(os.path.join(ROOT, 'prediction_250.csv'))
+    features = pd.read_csv(os.path.join(ROOT, 'test_250.csv'))
+    return predictions.merge(features, on='customer_id')
+
+
+@pytest.fixture
+def constraints() -> dict:
+    return dict(CONSTRAINTS)
+
+
+@pytest.fixture
+def make_optimizer(sample, constraints):
+    """Factory for loaded, constrained optimizers; disposes their models afterwards."""
+    optimizers = []
+
+    def make(data=None, constraints=constraints, actions=None, **kwargs):
+        optimizer = MusicStreamingRetentionOptimizer(**kwargs)
+        optimizers.append(optimizer)
+        quiet(optimizer.load_frames, sample if data is None else data, actions=actions)
+        quiet(optimizer.set_constraints, constraints)
+        return optimizer
+
+    yield make
+    for optimizer in optimizers:
+        quiet(optimizer.cleanup)
@@ -0,0 +1,85 @@
+"""Constants and assertions shared by the test modules."""
+
+import contextlib
+import io
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from music_streaming_retention_75k import (
+    GRB, RISK_LABELS, CustomerStore, EligibilityRules, EnvPool, JobCancelled, JobRunner, ModelCache,
+    MusicStreamingRetentionOptimizer, RunMetrics,
+    eligibility_mask, gp, open_scores, save_scores, validate_scores, write_table
+)
+
+# Constraint set used throughout the README on the sample
+CONSTRAINTS = {
+    'weekly_budget': 150,
+    'email_capacity': 120,
+    'call_capacity': 100,
+    'min_high_risk_pct': 0.6,
+    'min_premium_pct': 0.4,
+    'max_action_pct': 0.5,
+    'min_segment_coverage_pct': 0.15
+}
+
+# Gurobi's default MIPGap; two optimal plans agree to within it
+OBJECTIVE_TOL = 1e-4
+
+HAS_GUROBI = gp is not None
+
+
+def quiet(fn, *args, **kwargs):
+    """Call fn with its progress output suppressed."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(*args, **kwargs)
+
+
+def net_value(optimizer) -> float:
+    return optimizer.results['kpis']['net_value']
+
+
+def assert_feasible(optimizer):
+    """
+    Check the extracted plan against the optimizer's current constraints.
+
+    Works from results['assignments'] alone, so it holds for any backend or
+    solve path: one action per customer, every action eligible, and every
+    budget, capacity, saturation and coverage row satisfied.
+    """
+    assignments = optimizer.results['assignments']
+    assert assignments['customer_id'].is_unique
+
+    rows = pd.Index(optimizer.store.customer_id).get_indexer(assignments['customer_id'])
+    actions = pd.Index(optimizer.actions_df['action_id']).get_indexer(assignments['action_id'])
+    assert (rows >= 0).all() and (actions >= 0).all()
+
+    mask = eligibility_mask(optimizer.store, EligibilityRules.from_actions(optimizer.actions_df))
+    assert mask[rows, actions].all()
+
+    for row in optimizer._coupling_rows():
+        coef = row['action_coef'][actions]
+        if row['customer_mask'] is not None:
+            coef = coef * row['customer_mask'][rows]
+        used = float(np.sum(coef))
+        if row['sense'] == '<':
+            assert used <= row['rhs'] + 1e-6, f"{row['name']}: {used} > {row['rhs']}"
+        else:
+            assert used >= row['rhs'] - 1e-6, f"{row['name']}: {used} < {row['rhs']}"
+
+
+def assert_same_store(a, b):
+    """Two customer stores hold the same customers, scores, CLV and features."""
+    assert np.array_equal(a.customer_id, b.customer_id)
+    assert np.allclose(a.p, b.p)
+    assert np.allclose(a.v, b.v, rtol=1e-5)
+    assert np.array_equal(a.flags, b.flags)
+    assert sorted(a.codes) == sorted(b.codes)
+    for name in a.codes:
+        labels_a, labels_b = a.labels(name), b.labels(name)
+        assert pd.Series(labels_a).equals(pd.Series(labels_b)), name
@@ -0,0 +1,55 @@
+"""Matrix-API and expression builders must produce the same model."""
+
+import pytest
+
+from support import GRB, HAS_GUROBI, OBJECTIVE_TOL, assert_feasible, net_value, quiet
+
+pytestmark = pytest.mark.skipif(not HAS_GUROBI, reason="gurobipy is not installed")
+
+
+def test_matrix_and_expression_builds_agree(make_optimizer):
+    matrix = make_optimizer()
+    expression = make_optimizer()
+    quiet(matrix.optimize, 'matrix')
+    quiet(expression.optimize, 'expression')
+
+    assert net_value(matrix) == pytest.approx(net_value(expression), rel=OBJECTIVE_TOL)
+    assert matrix.model.NumConstrs == expression.model.NumConstrs
+    assert matrix.model.NumNZs == expression.model.NumNZs
+    assert matrix.results['binding_constraints'] == expression.results['binding_constraints']
+    assert_feasible(matrix)
+    assert_feasible(expression)
+
+
+def test_sample_objective(make_optimizer):
+    optimizer = make_optimizer()
+    quiet(optimizer.optimize)
+
+    assert net_value(optimizer) == pytest.approx(3478.8203, rel=OBJECTIVE_TOL)
+    assert optimizer.results['kpis']['customers_treated'] == 75
+
+
+@pytest.fixture
+def free_only(make_optimizer, constraints):
+    """Only Free customers can be treated, so the Premium coverage floor has no pairs."""
+    actions = make_optimizer().actions_df.copy()
+    actions.loc[actions['action_id'] > 0, 'eligible_segment'] = 'Free'
+    floor_only = {key: constraints[key] for key in ('weekly_budget', 'email_capacity', 'call_capacity', 'min_premium_pct')}
+    return lambda **kwargs: make_optimizer(constraints=floor_only, actions=actions, **kwargs)
+
+
+@pytest.mark.parametrize('build_mode', ['matrix', 'expression'])
+def test_floor_without_eligible_pairs_is_infeasible(free_only, build_mode):
+    optimizer = free_only()
+    quiet(optimizer.optimize, build_mode)
+
+    assert optimizer.results['solver']['status'] == GRB.INFEASIBLE
+    assert optimizer.results['solver']['objective'] is None
+    assert 'kpis' not in optimizer.results
+
+
+def test_greedy_reports_floor_without_eligible_pairs(free_only):
+    optimizer = free_only(solver='greedy')
+    quiet(optimizer.optimize)
+
+    assert optimizer.results['solver']['unmet_floors'] == {'min_premium': 24.0}
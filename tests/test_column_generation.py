@@ -0,0 +1,56 @@
+"""Column generation re-prices on every re-solve and is reported as price-and-branch."""
+
+import pytest
+
+from support import HAS_GUROBI, OBJECTIVE_TOL, assert_feasible, net_value, quiet
+
+pytestmark = pytest.mark.skipif(not HAS_GUROBI, reason="gurobipy is not installed")
+
+
+def check_against_milp(generated, full):
+    """A price-and-branch plan is feasible, no better than the MILP, and its bound covers it."""
+    solver = generated.results['solver']
+    assert solver['method'] == 'price-and-branch'
+    assert net_value(generated) <= net_value(full) * (1 + OBJECTIVE_TOL)
+    assert solver['bound'] >= net_value(full) * (1 - OBJECTIVE_TOL)
+    assert solver['gap'] >= 0
+    assert_feasible(generated)
+
+
+@pytest.mark.parametrize('budget', [150, 300])
+def test_generated_plan_is_bounded_by_milp(make_optimizer, constraints, budget):
+    constraints = dict(constraints, weekly_budget=budget)
+    generated = make_optimizer(constraints=constraints, column_generation=True)
+    full = make_optimizer(constraints=constraints)
+    quiet(generated.optimize)
+    quiet(full.optimize)
+
+    check_against_milp(generated, full)
+
+
+@pytest.mark.parametrize('before, after', [(150, 300), (600, 150)])
+def test_reoptimize_prices_again(make_optimizer, constraints, before, after):
+    reused = make_optimizer(constraints=dict(constraints, weekly_budget=before), column_generation=True)
+    quiet(reused.optimize)
+    quiet(reused.reoptimize, {'weekly_budget': after})
+    fresh = make_optimizer(constraints=dict(constraints, weekly_budget=after), column_generation=True)
+    quiet(fresh.optimize)
+    full = make_optimizer(constraints=dict(constraints, weekly_budget=after))
+    quiet(full.optimize)
+
+    assert net_value(reused) == pytest.approx(net_value(fresh), rel=OBJECTIVE_TOL)
+    check_against_milp(reused, full)
+
+
+def test_apply_delta_prices_again(sample, make_optimizer):
+    week = sample.assign(churn_probability=sample['churn_probability'].iloc[::-1].to_numpy())
+    reused = make_optimizer(column_generation=True)
+    quiet(reused.optimize)
+    quiet(reused.apply_delta, changed=week[['customer_id', 'churn_probability']])
+    fresh = make_optimizer(week, clv_model=reused.clv_model, column_generation=True)
+    quiet(fresh.optimize)
+    full = make_optimizer(week, clv_model=reused.clv_model)
+    quiet(full.optimize)
+
+    assert net_value(reused) == pytest.approx(net_value(fresh), rel=OBJECTIVE_TOL)
+    check_against_milp(reused, full)
@@ -0,0 +1,57 @@
+"""Patching last week's model with a customer diff must match a fresh solve of the new week."""
+
+import contextlib
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from support import HAS_GUROBI, OBJECTIVE_TOL, assert_feasible, net_value, quiet
+
+pytestmark = pytest.mark.skipif(not HAS_GUROBI, reason="gurobipy is not installed")
+
+
+def week_diff(sample, seed, n_changed, n_removed, n_added):
+    """A random diff of the sample and the customer table it leads to."""
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(len(sample))
+    changed = sample.iloc[order[:n_changed]][['customer_id']].assign(
+        churn_probability=rng.random(n_changed).round(4)
+    )
+    removed = sample['customer_id'].iloc[order[n_changed:n_changed + n_removed]].to_numpy()
+    added = sample.iloc[order[50:50 + n_added]].copy()
+    added['customer_id'] += 10**7
+    added['churn_probability'] = rng.random(n_added).round(4)
+
+    week = sample.set_index('customer_id')
+    week.loc[changed['customer_id'], 'churn_probability'] = changed['churn_probability'].to_numpy()
+    week = pd.concat([week.drop(index=removed).reset_index(), added], ignore_index=True)
+    return changed, removed, added, week
+
+
+@pytest.mark.parametrize('seed, n_changed, n_removed, n_added', [
+    (1, 8, 0, 0),
+    (2, 8, 3, 0),
+    (3, 8, 0, 6),
+    (4, 20, 5, 10)
+])
+def test_delta_matches_fresh_solve(sample, make_optimizer, seed, n_changed, n_removed, n_added):
+    changed, removed, added, week = week_diff(sample, seed, n_changed, n_removed, n_added)
+    patched = make_optimizer()
+    quiet(patched.optimize)
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        patched.apply_delta(
+            changed=changed,
+            removed=removed if n_removed else None,
+            added=added if n_added else None
+        )
+    fresh = make_optimizer(week, clv_model=patched.clv_model)
+    quiet(fresh.optimize)
+
+    assert "Patched model" in log.getvalue()  # The live model was patched, not rebuilt
+    assert np.array_equal(patched.store.customer_id, fresh.store.customer_id)
+    assert net_value(patched) == pytest.approx(net_value(fresh), rel=OBJECTIVE_TOL)
+    assert patched.results['binding_constraints'] == fresh.results['binding_constraints']
+    assert_feasible(patched)
@@ -0,0 +1,113 @@
+"""Compiled eligibility rules must reproduce the hard-coded segment logic they replaced."""
+
+import numpy as np
+import pytest
+
+from support import (
+    HAS_GUROBI, OBJECTIVE_TOL, RISK_LABELS, EligibilityRules, assert_feasible, eligibility_mask, net_value, quiet
+)
+
+
+def hard_coded_mask(customers, eligible_segment):
+    """The segment mask before rules: tiers and the high-value flag, anything else open to all."""
+    segment_masks = {
+        'Free': customers['subscription_type'].to_numpy() == 'Free',
+        'Premium': customers['subscription_type'].to_numpy() == 'Premium',
+        'high_value': customers['is_high_value'].to_numpy().astype(bool)
+    }
+    mask = np.ones((len(customers), len(eligible_segment)), dtype=bool)
+    for k, segment in enumerate(eligible_segment):
+        if segment in segment_masks:
+            mask[:, k] = segment_masks[segment]
+    return mask
+
+
+def rule_catalog(actions):
+    """The default catalog with every eligible_segment written as an explicit rule."""
+    rules = {
+        'all': 'p >= 0',
+        'Free': "subscription_type == 'Free'",
+        'Premium': "subscription_type == 'Premium'",
+        'high_value': 'high_value'
+    }
+    catalog = actions.drop(columns='eligible_segment')
+    catalog['eligibility'] = actions['eligible_segment'].map(rules)
+    return catalog
+
+
+def test_legacy_segments_match_hard_coded_mask(make_optimizer):
+    optimizer = make_optimizer()
+    actions = optimizer.actions_df
+
+    compiled = eligibility_mask(optimizer.store, EligibilityRules.from_actions(actions))
+    expected = hard_coded_mask(optimizer.customers_df, actions['eligible_segment'].to_numpy())
+    assert np.array_equal(compiled, expected)
+
+
+def test_explicit_rules_match_legacy_segments(make_optimizer):
+    optimizer = make_optimizer()
+    actions = optimizer.actions_df
+
+    legacy = eligibility_mask(optimizer.store, EligibilityRules.from_actions(actions))
+    explicit = eligibility_mask(optimizer.store, EligibilityRules.from_actions(rule_catalog(actions)))
+    assert np.array_equal(legacy, explicit)
+
+
+def test_ordered_rule_matches_pandas(make_optimizer):
+    optimizer = make_optimizer()
+    customers = optimizer.customers_df
+    rules = EligibilityRules([
+        "risk_segment >= 'medium_risk' and clv > 200",
+        "subscription_type in ('Premium', 'Student') and not high_risk",
+        "payment_plan == 'Monthly' or p > 0.8"
+    ])
+
+    risk_rank = customers['risk_segment'].map(RISK_LABELS.index).to_numpy()
+    expected = np.column_stack([
+        (risk_rank >= RISK_LABELS.index('medium_risk')) & (customers['v'].to_numpy() > 200),
+        customers['subscription_type'].isin(['Premium', 'Student']).to_numpy() & ~optimizer.store.flag('high_risk'),
+        (customers['payment_plan'].to_numpy() == 'Monthly') | (customers['p'].to_numpy() > 0.8)
+    ])
+    assert np.array_equal(eligibility_mask(optimizer.store, rules), expected)
+
+
+@pytest.mark.skipif(not HAS_GUROBI, reason="gurobipy is not installed")
+def test_rule_catalog_gives_same_plan(make_optimizer):
+    legacy = make_optimizer()
+    explicit = make_optimizer(actions=rule_catalog(legacy.actions_df))
+    quiet(legacy.optimize)
+    quiet(explicit.optimize)
+
+    assert net_value(explicit) == pytest.approx(net_value(legacy), rel=OBJECTIVE_TOL)
+    assert_feasible(explicit)
+
+
+@pytest.mark.parametrize('segment', ['medium_value', 'Gold', 'premium_users'])
+def test_unknown_segment_is_rejected(make_optimizer, segment):
+    actions = make_optimizer().actions_df.copy()
+    actions.loc[actions['action_id'] == 5, 'eligible_segment'] = segment
+
+    with pytest.raises(ValueError, match=f"Unknown eligible_segment '{segment}'"):
+        EligibilityRules.from_actions(actions)
+
+
+def test_every_tier_is_a_segment(make_optimizer):
+    optimizer = make_optimizer()
+    actions = optimizer.actions_df.copy()
+    actions.loc[actions['action_id'] == 5, 'eligible_segment'] = 'Family'
+
+    mask = eligibility_mask(optimizer.store, EligibilityRules.from_actions(actions))
+    family = optimizer.customers_df['subscription_type'].to_numpy() == 'Family'
+    assert family.any()
+    assert np.array_equal(mask[:, actions['action_id'].tolist().index(5)], family)
+
+
+def test_rule_overrides_unknown_segment(make_optimizer):
+    optimizer = make_optimizer()
+    actions = optimizer.actions_df.copy()
+    actions['eligibility'] = ''
+    actions.loc[actions['action_id'] == 5, ['eligible_segment', 'eligibility']] = ['medium_value', 'high_value']
+
+    mask = eligibility_mask(optimizer.store, EligibilityRules.from_actions(actions))
+    expected = eligibility_mask(optimizer.store, EligibilityRules.from_actions(optimizer.actions_df))
+    assert np.array_equal(mask, expected)
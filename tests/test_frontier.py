@@ -0,0 +1,46 @@
+"""The budget frontier leaves the optimizer as it found it, also when tracing fails."""
+
+import pytest
+
+from support import HAS_GUROBI, OBJECTIVE_TOL, assert_feasible, net_value, quiet
+
+pytestmark = pytest.mark.skipif(not HAS_GUROBI, reason="gurobipy is not installed")
+
+
+def check_restored(optimizer, constraints, expected):
+    """Constraints are back to the base set and a fresh solve reproduces the base plan."""
+    assert optimizer.constraints == constraints
+    assert optimizer.model is None
+    quiet(optimizer.optimize)
+    assert net_value(optimizer) == pytest.approx(expected, rel=OBJECTIVE_TOL)
+    assert_feasible(optimizer)
+
+
+def test_infeasible_budget_min_restores_constraints(make_optimizer, constraints):
+    optimizer = make_optimizer()
+    quiet(optimizer.optimize)
+    expected = net_value(optimizer)
+
+    with pytest.raises(ValueError, match="infeasible at \\$1"):
+        quiet(optimizer.frontier, 1, 600)
+    check_restored(optimizer, constraints, expected)
+
+
+def test_unsolved_lp_restores_constraints(make_optimizer, constraints):
+    optimizer = make_optimizer(solver_options={'TimeLimit': 0})
+    with pytest.raises(RuntimeError, match="did not solve"):
+        quiet(optimizer.frontier, 150, 600)
+
+    optimizer.solver_options = {}
+    reference = make_optimizer()
+    quiet(reference.optimize)
+    check_restored(optimizer, constraints, net_value(reference))
+
+
+def test_polished_frontier_restores_constraints(make_optimizer, constraints):
+    optimizer = make_optimizer()
+    quiet(optimizer.optimize)
+    expected = net_value(optimizer)
+
+    quiet(optimizer.frontier, 200, 300, polish=True)
+    check_restored(optimizer, constraints, expected)
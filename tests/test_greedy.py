@@ -0,0 +1,29 @@
+"""The greedy heuristic returns feasible plans bounded by the LP relaxation and the MILP."""
+
+import pytest
+
+from support import HAS_GUROBI, OBJECTIVE_TOL, assert_feasible, net_value, quiet
+
+
+@pytest.mark.parametrize('budget', [150, 300, 600])
+def test_greedy_plan_is_feasible_and_bounded(make_optimizer, constraints, budget):
+    optimizer = make_optimizer(constraints=dict(constraints, weekly_budget=budget), solver='greedy')
+    quiet(optimizer.optimize, lp_bound=True)
+    solver = optimizer.results['solver']
+
+    assert solver['unmet_floors'] == {}
+    assert_feasible(optimizer)
+    assert solver['objective'] == pytest.approx(net_value(optimizer))
+    assert solver['bound'] >= solver['objective'] - 1e-6
+    assert solver['gap'] >= 0
+
+
+@pytest.mark.skipif(not HAS_GUROBI, reason="gurobipy is not installed")
+def test_greedy_does_not_beat_milp(make_optimizer):
+    greedy = make_optimizer(solver='greedy')
+    milp = make_optimizer()
+    quiet(greedy.optimize, lp_bound=True)
+    quiet(milp.optimize)
+
+    assert net_value(greedy) <= net_value(milp) * (1 + OBJECTIVE_TOL)
+    assert greedy.results['solver']['bound'] >= net_value(milp) * (1 - OBJECTIVE_TOL)
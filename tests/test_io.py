@@ -0,0 +1,190 @@
+"""Score hand-off files, table formats and the Gurobi environment pool."""
+
+import importlib.util
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from support import (
+    HAS_GUROBI, OBJECTIVE_TOL, EnvPool, MusicStreamingRetentionOptimizer, assert_same_store, net_value, open_scores,
+    quiet, save_scores, validate_scores, write_table
+)
+from music_streaming_retention_75k import _read_table
+
+needs_pyarrow = pytest.mark.skipif(importlib.util.find_spec('pyarrow') is None, reason="pyarrow is not installed")
+needs_gurobi = pytest.mark.skipif(not HAS_GUROBI, reason="gurobipy is not installed")
+
+
+@pytest.fixture
+def scored(sample):
+    return sample.sort_values('customer_id', ignore_index=True)
+
+
+def test_saved_scores_are_sorted_and_mapped(tmp_path, scored):
+    shuffled = scored.sample(frac=1, random_state=0)
+    path = tmp_path / 'scores.npy'
+    save_scores(str(path), shuffled['customer_id'].to_numpy(), shuffled['churn_probability'].to_numpy())
+
+    ids, p = open_scores(str(path))
+    assert isinstance(ids, np.memmap) and isinstance(p, np.memmap)
+    assert np.array_equal(ids, scored['customer_id'])
+    assert np.allclose(p, scored['churn_probability'])
+    validate_scores(ids, p)
+
+
+@needs_pyarrow
+def test_arrow_scores_round_trip(tmp_path, scored):
+    path = tmp_path / 'scores.arrow'
+    write_table(scored[['customer_id', 'churn_probability']], str(path))
+
+    ids, p = open_scores(str(path))
+    assert np.array_equal(ids, scored['customer_id'])
+    assert np.array_equal(p, scored['churn_probability'])
+
+
+@needs_pyarrow
+def test_open_scores_rejects_other_files(tmp_path, scored):
+    plain = tmp_path / 'plain.npy'
+    np.save(plain, scored['churn_probability'].to_numpy())
+    with pytest.raises(ValueError, match="expected a structured array"):
+        open_scores(str(plain))
+
+    csv = tmp_path / 'scores.csv'
+    write_table(scored[['customer_id', 'churn_probability']], str(csv))
+    with pytest.raises(ValueError, match="must be a .npy or Arrow file"):
+        open_scores(str(csv))
+
+    arrow = tmp_path / 'ids.arrow'
+    write_table(scored[['customer_id']], str(arrow))
+    with pytest.raises(ValueError, match="missing columns \\['churn_probability'\\]"):
+        open_scores(str(arrow))
+
+
+@pytest.mark.parametrize('ids, p, problem', [
+    (np.array([1.0, 2.0]), np.array([0.1, 0.2]), "customer_id must be integer"),
+    (np.array([1, 2]), np.array([0, 1]), "churn_probability must be floating point"),
+    (np.array([1, 2, 3]), np.array([0.1, 0.2]), "3 ids but 2 probabilities"),
+    (np.array([1, 2, 3]), np.array([0.1, 1.5, np.nan]), "2 probabilities missing or outside"),
+    (np.array([1, 3, 2]), np.array([0.1, 0.2, 0.3]), "not sorted ascending \\(first at row 2\\)"),
+    (np.array([1, 2, 2, 2]), np.array([0.1, 0.2, 0.3, 0.4]), "2 duplicate customer_id values"),
+])
+def test_validate_scores_names_the_problem(ids, p, problem):
+    with pytest.raises(ValueError, match=problem):
+        validate_scores(ids, p)
+
+
+def test_validate_scores_lists_every_problem():
+    with pytest.raises(ValueError, match="outside \\[0, 1\\]; customer_id not sorted ascending"):
+        validate_scores(np.array([2, 1]), np.array([0.5, -0.1]))
+
+
+@pytest.mark.parametrize('ext', ['csv', pytest.param('parquet', marks=needs_pyarrow), pytest.param('arrow', marks=needs_pyarrow)])
+def test_write_table_round_trip(tmp_path, scored, ext):
+    path = tmp_path / f'customers.{ext}'
+    write_table(scored, str(path))
+
+    assert _read_table(str(path)).equals(scored)
+    columns = ('subscription_type', 'customer_id')
+    assert _read_table(str(path), columns).equals(scored[['customer_id', 'subscription_type']])
+
+
+@pytest.mark.parametrize('ext', [pytest.param('parquet', marks=needs_pyarrow), pytest.param('arrow', marks=needs_pyarrow)])
+@pytest.mark.parametrize('chunksize', [None, 64])
+def test_columnar_files_load_like_csv(tmp_path, scored, ext, chunksize):
+    stores = {}
+    for fmt in ('csv', ext):
+        churn, features = tmp_path / f'churn.{fmt}', tmp_path / f'features.{fmt}'
+        write_table(scored[['customer_id', 'churn_probability']], str(churn))
+        write_table(scored.drop(columns='churn_probability'), str(features))
+        optimizer = MusicStreamingRetentionOptimizer()
+        quiet(optimizer.load_data, str(churn), str(features), chunksize=chunksize)
+        stores[fmt] = optimizer.store
+
+    assert_same_store(stores[ext], stores['csv'])
+
+
+def test_mapped_scores_load_like_frames(tmp_path, scored, make_optimizer):
+    path, features = tmp_path / 'scores.npy', tmp_path / 'features.csv'
+    save_scores(str(path), scored['customer_id'].to_numpy(), scored['churn_probability'].to_numpy())
+    write_table(scored.drop(columns='churn_probability'), str(features))
+
+    mapped = MusicStreamingRetentionOptimizer()
+    quiet(mapped.load_scores, str(path), str(features), chunksize=64)
+    framed = make_optimizer(scored)
+    assert_same_store(mapped.store, framed.store)
+
+    if HAS_GUROBI:
+        quiet(mapped.set_constraints, dict(framed.constraints))
+        quiet(mapped.optimize)
+        quiet(framed.optimize)
+        assert net_value(mapped) == pytest.approx(net_value(framed), rel=OBJECTIVE_TOL)
+        quiet(mapped.cleanup)
+
+
+def test_load_scores_validates(tmp_path, scored):
+    path = tmp_path / 'scores.npy'
+    records = np.zeros(3, dtype=[('customer_id', '<i8'), ('churn_probability', '<f4')])
+    records['customer_id'] = [1, 1, 2]
+    records['churn_probability'] = [0.1, 0.2, 0.3]
+    np.save(path, records)
+
+    with pytest.raises(ValueError, match="1 duplicate customer_id values"):
+        quiet(MusicStreamingRetentionOptimizer().load_scores, str(path))
+
+
+@needs_gurobi
+def test_env_pool_waits_for_a_free_environment():
+    with EnvPool(size=1, params={'OutputFlag': 0}) as pool:
+        env = pool.acquire()
+        with pytest.raises(TimeoutError):
+            pool.acquire(timeout=0.05)
+
+        # A waiting checkout gets the environment as soon as it is returned
+        threading.Timer(0.1, pool.release, [env]).start()
+        with pool.env(timeout=5) as again:
+            assert again is env
+        assert pool.stats['started'] == 1 and pool.stats['checkouts'] == 2
+
+    with pytest.raises(RuntimeError, match="closed"):
+        pool.acquire(timeout=0)
+
+
+@needs_gurobi
+def test_env_pool_under_contention():
+    size, n_threads, per_thread = 2, 6, 4
+    in_use, peak, lock, errors = [0], [0], threading.Lock(), []
+
+    def work(pool):
+        try:
+            for _ in range(per_thread):
+                with pool.model(Threads=1) as model:
+                    with lock:
+                        in_use[0] += 1
+                        peak[0] = max(peak[0], in_use[0])
+                    assert model.Params.Threads == 1
+                    x = model.addVar(ub=1, obj=-1)
+                    model.optimize()
+                    assert x.X == 1
+                    time.sleep(0.005)
+                    with lock:
+                        in_use[0] -= 1
+        except Exception as e:
+            errors.append(e)
+
+    with EnvPool(size=size, params={'OutputFlag': 0}) as pool:
+        threads = [threading.Thread(target=work, args=(pool,)) for _ in range(n_threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        assert 1 <= peak[0] <= size
+        assert pool.stats['started'] <= size
+        assert pool.stats['checkouts'] == n_threads * per_thread
+
+        # Checkout parameters are undone on release
+        with pool.env() as env:
+            assert env.getParam('Threads') == 0
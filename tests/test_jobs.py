@@ -0,0 +1,101 @@
+"""Jobs on a warm worker must return the plan a fresh solve of their own constraints would."""
+
+from types import SimpleNamespace
+
+import pytest
+
+import music_streaming_retention_75k as retention
+from support import (
+    CONSTRAINTS, HAS_GUROBI, OBJECTIVE_TOL, JobCancelled, JobRunner, RunMetrics, assert_feasible, net_value, quiet
+)
+
+pytestmark = pytest.mark.skipif(not HAS_GUROBI, reason="gurobipy is not installed")
+
+# C' adds a saturation cap C does not have, so merging C into C' would keep it
+C = {key: value for key, value in CONSTRAINTS.items() if key not in ('max_action_pct', 'min_segment_coverage_pct')}
+C['weekly_budget'] = 300
+C_PRIME = dict(C, max_action_pct=0.2)
+
+
+@pytest.fixture(scope='module')
+def runner():
+    """One worker, so every job lands on the same warm optimizer."""
+    with JobRunner(max_workers=1) as runner:
+        yield runner
+
+
+def check_job(result, make_optimizer, constraints):
+    """The job's plan is feasible and matches a fresh in-process solve."""
+    fresh = make_optimizer(constraints=constraints)
+    quiet(fresh.optimize)
+    assert result['results']['kpis']['net_value'] == pytest.approx(net_value(fresh), rel=OBJECTIVE_TOL)
+
+    fresh.results = result['results']
+    assert_feasible(fresh)
+
+
+def test_constraints_do_not_leak_between_jobs(runner, sample, make_optimizer):
+    results = [runner.result(runner.submit(sample, constraints)) for constraints in (C, C_PRIME, C)]
+
+    for result, constraints in zip(results, (C, C_PRIME, C)):
+        check_job(result, make_optimizer, constraints)
+    assert results[2]['results']['kpis']['net_value'] == pytest.approx(
+        results[0]['results']['kpis']['net_value'], rel=OBJECTIVE_TOL
+    )
+    # Later jobs reuse the worker's optimizer; C' adds rows, so the model is rebuilt
+    assert 'ingestion' in results[0]['metrics']['stages']
+    assert 'ingestion' not in results[1]['metrics']['stages']
+    assert 'ingestion' not in results[2]['metrics']['stages']
+
+
+def test_budget_change_resolves_in_place(runner, sample, make_optimizer):
+    runner.result(runner.submit(sample, C))
+    constraints = dict(C, weekly_budget=200)
+    result = runner.result(runner.submit(sample, constraints))
+
+    assert list(result['metrics']['stages']) == ['solve', 'extraction']
+    check_job(result, make_optimizer, constraints)
+
+
+def test_worker_recovers_from_infeasible_job(runner, sample, make_optimizer):
+    infeasible = runner.submit(sample, dict(C, weekly_budget=10))
+    with pytest.raises(RuntimeError, match="No plan found"):
+        runner.result(infeasible)
+    assert runner.poll(infeasible)['state'] == 'failed'
+
+    check_job(runner.result(runner.submit(sample, C)), make_optimizer, C)
+
+
+def submit_cancelled(runner, monkeypatch, sample, constraints):
+    """Submit a job already marked cancelled, so it stops at its first stage."""
+    job_id = 'cancelled-00'
+    monkeypatch.setattr(retention, 'uuid', SimpleNamespace(uuid4=lambda: SimpleNamespace(hex=job_id)))
+    runner._cancelled[job_id] = True
+    assert runner.submit(sample, constraints) == job_id
+    with pytest.raises(JobCancelled):
+        runner.result(job_id)
+    return job_id
+
+
+@pytest.mark.parametrize('cancelled', [dict(C, weekly_budget=200), C_PRIME])
+def test_job_after_cancelled_job_solves_afresh(runner, monkeypatch, sample, make_optimizer, cancelled):
+    runner.result(runner.submit(sample, C))
+    job_id = submit_cancelled(runner, monkeypatch, sample, cancelled)
+    assert runner.poll(job_id)['state'] == 'cancelled'
+
+    result = runner.result(runner.submit(sample, C))
+    assert 'ingestion' in result['metrics']['stages']  # The cancelled job's optimizer was dropped
+    check_job(result, make_optimizer, C)
+
+
+def test_listener_raising_at_stage_start_leaves_metrics_clean():
+    def listener(event):
+        if event['event'] == 'stage_start':
+            raise JobCancelled('job')
+
+    metrics = RunMetrics(listener=listener)
+    with pytest.raises(JobCancelled):
+        with metrics.stage('build'):
+            pass
+    assert metrics._open == []
+    assert metrics.stages == {}
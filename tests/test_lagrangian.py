@@ -0,0 +1,44 @@
+"""The Lagrangian backend returns feasible plans with a valid dual bound."""
+
+import pytest
+
+from support import HAS_GUROBI, OBJECTIVE_TOL, assert_feasible, net_value, quiet
+
+# Worst gap seen on the sample is 1.0% (budget 150)
+MAX_GAP = 0.02
+
+
+@pytest.mark.parametrize('budget', [150, 300, 600])
+def test_lagrangian_plan_is_feasible_and_bounded(make_optimizer, constraints, budget):
+    optimizer = make_optimizer(constraints=dict(constraints, weekly_budget=budget), solver='lagrangian')
+    quiet(optimizer.optimize)
+    solver = optimizer.results['solver']
+
+    assert solver['unmet_floors'] == {}
+    assert_feasible(optimizer)
+    assert solver['objective'] == pytest.approx(net_value(optimizer))
+    assert solver['bound'] >= solver['objective'] - 1e-6
+    assert solver['gap'] <= MAX_GAP
+
+
+@pytest.mark.skipif(not HAS_GUROBI, reason="gurobipy is not installed")
+@pytest.mark.parametrize('budget', [150, 300, 600])
+def test_lagrangian_bound_covers_milp(make_optimizer, constraints, budget):
+    constraints = dict(constraints, weekly_budget=budget)
+    lagrangian = make_optimizer(constraints=constraints, solver='lagrangian')
+    milp = make_optimizer(constraints=constraints)
+    quiet(lagrangian.optimize)
+    quiet(milp.optimize)
+
+    assert lagrangian.results['solver']['bound'] >= net_value(milp) * (1 - OBJECTIVE_TOL)
+    assert net_value(lagrangian) <= net_value(milp) * (1 + OBJECTIVE_TOL)
+
+
+def test_chunked_pricing_matches_one_block(make_optimizer):
+    whole = make_optimizer(solver='lagrangian')
+    chunked = make_optimizer(solver='lagrangian', solver_options={'chunk_size': 64})
+    quiet(whole.optimize)
+    quiet(chunked.optimize)
+
+    assert net_value(chunked) == pytest.approx(net_value(whole), rel=1e-6)
+    assert chunked.results['solver']['bound'] == pytest.approx(whole.results['solver']['bound'], rel=1e-6)
@@ -0,0 +1,80 @@
+"""Chunked and whole-file loaders must build the same customer store from the same files."""
+
+import numpy as np
+import pytest
+
+from support import CustomerStore, MusicStreamingRetentionOptimizer, assert_same_store, quiet
+
+
+def load(churn_file, features_file=None, chunksize=None):
+    optimizer = MusicStreamingRetentionOptimizer()
+    quiet(optimizer.load_data, str(churn_file), str(features_file) if features_file else None, chunksize=chunksize)
+    return optimizer.store
+
+
+@pytest.fixture
+def scored(sample):
+    """The sample sorted by customer_id, as the chunked loader returns it."""
+    return sample.sort_values('customer_id', ignore_index=True)
+
+
+@pytest.mark.parametrize('chunksize', [64, 1000])
+def test_chunked_load_matches_whole_file(tmp_path, scored, chunksize):
+    churn, features = tmp_path / 'churn.csv', tmp_path / 'features.csv'
+    scored[['customer_id', 'churn_probability']].to_csv(churn, index=False)
+    scored.drop(columns='churn_probability').to_csv(features, index=False)
+
+    assert_same_store(load(churn, features, chunksize), load(churn, features))
+
+
+@pytest.mark.parametrize('chunksize', [64, 1000])
+def test_chunked_load_reads_features_in_churn_file(tmp_path, scored, chunksize):
+    churn, features = tmp_path / 'churn.csv', tmp_path / 'features.csv'
+    scored[['customer_id', 'churn_probability', 'subscription_type']].to_csv(churn, index=False)
+    scored.drop(columns=['churn_probability', 'subscription_type']).to_csv(features, index=False)
+
+    store = load(churn, features, chunksize)
+    assert store.has('subscription_type')
+    assert_same_store(store, load(churn, features))
+
+    # Features only in the churn file
+    inline = tmp_path / 'inline.csv'
+    scored.to_csv(inline, index=False)
+    assert_same_store(load(inline, None, chunksize), load(inline))
+
+
+@pytest.mark.parametrize('chunksize', [64, None])
+def test_feature_in_both_files_is_rejected(tmp_path, scored, chunksize):
+    churn, features = tmp_path / 'churn.csv', tmp_path / 'features.csv'
+    scored[['customer_id', 'churn_probability', 'payment_plan']].to_csv(churn, index=False)
+    scored.drop(columns='churn_probability').to_csv(features, index=False)
+
+    with pytest.raises(ValueError, match="payment_plan found in both"):
+        load(churn, features, chunksize)
+
+
+@pytest.mark.parametrize('chunksize', [64, 1000])
+def test_many_categories_keep_their_codes(tmp_path, scored, chunksize):
+    # 250 distinct tiers: more than int8 codes can hold
+    scored = scored.assign(subscription_type=[f"tier_{i:03d}" for i in range(len(scored))])
+    scored.loc[::50, 'subscription_type'] = 'Premium'
+    churn, features = tmp_path / 'churn.csv', tmp_path / 'features.csv'
+    scored[['customer_id', 'churn_probability']].to_csv(churn, index=False)
+    scored.drop(columns='churn_probability').to_csv(features, index=False)
+
+    store = load(churn, features, chunksize)
+    assert list(store.labels('subscription_type')) == scored['subscription_type'].tolist()
+    assert np.array_equal(store.flag('premium'), (scored['subscription_type'] == 'Premium').to_numpy())
+    assert_same_store(store, load(churn, features))
+
+
+def test_concat_widens_codes(scored):
+    tiers = [f"tier_{i:03d}" for i in range(len(scored))]
+    frame = scored.rename(columns={'churn_probability': 'p'}).assign(v=100.0, subscription_type=tiers)
+    first = CustomerStore.from_frame(frame.iloc[:100])
+    second = CustomerStore.from_frame(frame.iloc[100:200])
+    assert second.codes['subscription_type'].dtype == np.int8
+
+    # second's codes land at 100..199 in the merged table
+    merged = CustomerStore.concat([first, second])
+    assert list(merged.labels('subscription_type')) == tiers[:200]
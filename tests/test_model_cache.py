@@ -0,0 +1,111 @@
+"""ModelCache hits reproduce the uncached plan, re-solve correctly and evict least recently used entries."""
+
+import contextlib
+import io
+import os
+
+import numpy as np
+import pytest
+
+from support import HAS_GUROBI, OBJECTIVE_TOL, ModelCache, assert_feasible, net_value, quiet
+
+pytestmark = pytest.mark.skipif(not HAS_GUROBI, reason="gurobipy is not installed")
+
+
+def logged(fn, *args, **kwargs) -> str:
+    """Call fn and return what it printed."""
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        fn(*args, **kwargs)
+    return log.getvalue()
+
+
+@pytest.fixture
+def reference(make_optimizer):
+    """Uncached optimum of the README constraints."""
+    optimizer = make_optimizer()
+    quiet(optimizer.optimize)
+    return net_value(optimizer)
+
+
+@pytest.mark.parametrize('build_mode', ['matrix', 'expression'])
+def test_repeat_run_hits_the_cache(tmp_path, make_optimizer, reference, build_mode):
+    cache = ModelCache(str(tmp_path))
+    first = make_optimizer(cache=cache)
+    assert "Cache hit" not in logged(first.optimize, build_mode)
+
+    second = make_optimizer(cache=cache)
+    log = logged(second.optimize, build_mode)
+    assert "Cache hit" in log
+    assert "MIP start from the cached solution" in log
+    assert 'eligibility' not in second.metrics.stages and 'presolve' not in second.metrics.stages
+    assert second.results['presolve'] == first.results['presolve']
+    assert net_value(second) == pytest.approx(reference, rel=OBJECTIVE_TOL)
+    assert_feasible(second)
+
+
+def test_other_constraints_miss_the_cache(tmp_path, make_optimizer, constraints):
+    cache = ModelCache(str(tmp_path))
+    quiet(make_optimizer(cache=cache).optimize)
+
+    other = make_optimizer(constraints=dict(constraints, weekly_budget=300), cache=cache)
+    assert "Cache hit" not in logged(other.optimize)
+    assert len(os.listdir(tmp_path)) == 2
+
+
+@pytest.mark.parametrize('build_mode', ['matrix', 'expression'])
+def test_stored_model_is_read_back(tmp_path, make_optimizer, reference, build_mode):
+    cache = ModelCache(str(tmp_path), store_models=True)
+    quiet(make_optimizer(cache=cache).optimize, build_mode)
+
+    second = make_optimizer(cache=cache)
+    assert "Model read from the cache" in logged(second.optimize, build_mode)
+    assert 'build' not in second.metrics.stages
+    assert net_value(second) == pytest.approx(reference, rel=OBJECTIVE_TOL)
+    assert_feasible(second)
+
+
+@pytest.mark.parametrize('store_models', [False, True])
+def test_reoptimize_after_cache_hit(tmp_path, make_optimizer, constraints, reference, store_models):
+    cache = ModelCache(str(tmp_path), store_models=store_models)
+    quiet(make_optimizer(cache=cache).optimize)
+
+    cached = make_optimizer(cache=cache)
+    quiet(cached.optimize)
+    quiet(cached.reoptimize, {'weekly_budget': 300})
+    fresh = make_optimizer(constraints=dict(constraints, weekly_budget=300))
+    quiet(fresh.optimize)
+    assert net_value(cached) == pytest.approx(net_value(fresh), rel=OBJECTIVE_TOL)
+    assert_feasible(cached)
+
+    # The re-solved plan is not written back under the original constraints' key
+    third = make_optimizer(cache=cache)
+    quiet(third.optimize)
+    assert net_value(third) == pytest.approx(reference, rel=OBJECTIVE_TOL)
+
+
+def test_least_recently_used_entry_is_evicted(tmp_path):
+    cache = ModelCache(str(tmp_path))
+    keys = [ModelCache.key('entry', k) for k in range(3)]
+    for age, key in zip((100, 200, 300), keys):
+        cache.save_arrays(key, 'pairs', {'value': np.zeros(1000)})
+        os.utime(tmp_path / key, (age, age))
+    entry_size = cache.size() // 3
+
+    assert cache.path(keys[0], 'pairs.npz') is not None  # Refreshes the oldest entry
+    cache.max_bytes = 2 * entry_size
+    cache.evict()
+
+    assert sorted(os.listdir(tmp_path)) == sorted([keys[0], keys[2]])
+    assert cache.load_arrays(keys[1], 'pairs') is None
+    assert np.array_equal(cache.load_arrays(keys[0], 'pairs')['value'], np.zeros(1000))
+
+
+def test_write_evicts_but_keeps_the_new_entry(tmp_path):
+    cache = ModelCache(str(tmp_path), max_bytes=1)
+    first, second = ModelCache.key('first'), ModelCache.key('second')
+    cache.save_arrays(first, 'pairs', {'value': np.zeros(10)})
+    cache.save_arrays(second, 'pairs', {'value': np.ones(10)})
+
+    assert os.listdir(tmp_path) == [second]
+    assert np.array_equal(cache.load_arrays(second, 'pairs')['value'], np.ones(10))
@@ -0,0 +1,28 @@
+"""Pruning pairs before the build must not change the optimum."""
+
+import pytest
+
+from support import HAS_GUROBI, OBJECTIVE_TOL, assert_feasible, net_value, quiet
+
+
+@pytest.mark.skipif(not HAS_GUROBI, reason="gurobipy is not installed")
+@pytest.mark.parametrize('budget', [150, 600])
+def test_presolve_keeps_the_optimum(make_optimizer, constraints, budget):
+    constraints = dict(constraints, weekly_budget=budget)
+    pruned = make_optimizer(constraints=constraints)
+    full = make_optimizer(constraints=constraints)
+    quiet(pruned.optimize, presolve=True)
+    quiet(full.optimize, presolve=False)
+
+    assert len(pruned.pairs['value']) < len(full.pairs['value'])
+    assert net_value(pruned) == pytest.approx(net_value(full), rel=OBJECTIVE_TOL)
+    assert_feasible(pruned)
+    assert_feasible(full)
+
+
+def test_presolved_greedy_plan_is_feasible(make_optimizer):
+    optimizer = make_optimizer(solver='greedy')
+    quiet(optimizer.optimize, presolve=True)
+
+    assert optimizer.results['solver']['unmet_floors'] == {}
+    assert_feasible(optimizer)
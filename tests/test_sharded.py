@@ -0,0 +1,24 @@
+"""Sharded solves return feasible plans close to, and bounded by, the monolithic optimum."""
+
+import pytest
+
+from support import HAS_GUROBI, OBJECTIVE_TOL, assert_feasible, net_value, quiet
+
+pytestmark = pytest.mark.skipif(not HAS_GUROBI, reason="gurobipy is not installed")
+
+# Worst gap seen on the sample is 1.0% (4 hash shards)
+MAX_GAP = 0.02
+
+
+@pytest.mark.parametrize('n_shards, shard_by', [(2, 'hash'), (4, 'hash'), (3, 'subscription_type')])
+def test_sharded_matches_monolithic(make_optimizer, n_shards, shard_by):
+    optimizer = make_optimizer()
+    quiet(optimizer.optimize_sharded, n_shards, shard_by, monolithic=True)
+    solver = optimizer.results['solver']
+    monolithic = solver['monolithic_objective']
+
+    assert_feasible(optimizer)
+    assert solver['objective'] == pytest.approx(net_value(optimizer))
+    assert solver['objective'] <= monolithic * (1 + OBJECTIVE_TOL)
+    assert solver['bound'] >= monolithic * (1 - OBJECTIVE_TOL)
+    assert solver['gap_vs_monolithic'] <= MAX_GAP
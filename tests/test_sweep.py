@@ -0,0 +1,47 @@
+"""Sweeps and the budget frontier agree with solving each scenario from scratch."""
+
+import numpy as np
+import pytest
+
+from support import HAS_GUROBI, OBJECTIVE_TOL, net_value, quiet
+
+pytestmark = pytest.mark.skipif(not HAS_GUROBI, reason="gurobipy is not installed")
+
+GRID = {'weekly_budget': [150, 250, 400], 'email_capacity': [100, 160]}
+
+
+def fresh_value(make_optimizer, constraints, scenario) -> float:
+    optimizer = make_optimizer(constraints=dict(constraints, **scenario))
+    quiet(optimizer.optimize)
+    return net_value(optimizer)
+
+
+def lp_value(make_optimizer, constraints, budget) -> float:
+    """LP relaxation over every eligible pair at this budget, solved from scratch with HiGHS."""
+    optimizer = make_optimizer(constraints=dict(constraints, weekly_budget=budget))
+    pairs = quiet(optimizer._prepared_pairs, False)
+    return optimizer._solve_lp_relaxation(pairs)['objective']
+
+
+def test_parallel_and_serial_sweeps_match_fresh_solves(make_optimizer, constraints):
+    serial = quiet(make_optimizer().sweep, GRID)
+    parallel = quiet(make_optimizer().sweep, GRID, n_workers=2)
+
+    assert len(serial) == len(parallel) == 6
+    assert (serial['status'] == 'optimal').all() and (parallel['status'] == 'optimal').all()
+    assert serial[list(GRID)].equals(parallel[list(GRID)])
+    assert np.allclose(serial['net_value'], parallel['net_value'], rtol=OBJECTIVE_TOL)
+    for scenario, value in zip(serial[list(GRID)].to_dict('records'), serial['net_value']):
+        assert value == pytest.approx(fresh_value(make_optimizer, constraints, scenario), rel=OBJECTIVE_TOL), scenario
+
+
+def test_frontier_matches_lp_relaxation(make_optimizer, constraints):
+    curve = quiet(make_optimizer().frontier, 150, 600)
+    assert len(curve) > 2
+    assert (np.diff(curve['marginal_value']) <= 1e-6).all()
+
+    # Breakpoints, and points between them on the piecewise-linear curve
+    budgets = [*curve['budget'].iloc[[0, len(curve) // 2, -1]], 160, 275, 480]
+    for budget in budgets:
+        traced = np.interp(budget, curve['budget'], curve['lp_net_value'])
+        assert traced == pytest.approx(lp_value(make_optimizer, constraints, budget), rel=OBJECTIVE_TOL), budget